@@ -0,0 +1,95 @@
+"""On-disk cache for Feefo product ratings responses."""
+
+import hashlib
+import logging
+import os
+import shelve
+import time
+from types import TracebackType
+from typing import Any
+
+from pipeline.settings import DEFAULT_CACHE_TTL_SECONDS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RatingsCache:
+    """
+    Shelve-backed cache of product ratings keyed by merchant, SKU and period.
+
+    Entries older than ttl_seconds are treated as misses. The cache is not
+    thread-safe; only access it from the thread that opened it.
+    """
+
+    def __init__(self, path: str | None = None, ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS) -> None:
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: Cache file path (default: FEEFO_CACHE_PATH env var or data/feefo_ratings_cache)
+            ttl_seconds: Maximum age of a cache entry in seconds
+        """
+        # Use environment variable for cache path (for test isolation)
+        self.path = path or os.getenv("FEEFO_CACHE_PATH") or "data/feefo_ratings_cache"
+        self.ttl_seconds = ttl_seconds
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        logger.debug("Opening ratings cache: %s", self.path)
+        self._shelf = shelve.open(self.path)
+
+    @staticmethod
+    def _key(merchant_id: str, sku: str, period_days: int | None) -> str:
+        """Build a fixed-size cache key for a merchant/SKU/period combination."""
+        return hashlib.blake2b(f"{merchant_id}|{sku}|{period_days}".encode(), digest_size=16).hexdigest()
+
+    def get(self, merchant_id: str, sku: str, period_days: int | None = None) -> list[dict[str, Any]] | None:
+        """
+        Look up cached product ratings for a SKU.
+
+        Args:
+            merchant_id: Merchant identifier
+            sku: Product SKU
+            period_days: Ratings period filter the entry was fetched with
+
+        Returns:
+            Cached product rating records, or None on a miss or expired entry
+        """
+        entry = self._shelf.get(self._key(merchant_id, sku, period_days))
+        if entry is None:
+            return None
+
+        fetched_at, products = entry
+        if time.time() - fetched_at > self.ttl_seconds:
+            return None
+        return list(products)
+
+    def set(self, merchant_id: str, sku: str, period_days: int | None, products: list[dict[str, Any]]) -> None:
+        """
+        Store product ratings for a SKU.
+
+        Args:
+            merchant_id: Merchant identifier
+            sku: Product SKU
+            period_days: Ratings period filter the records were fetched with
+            products: Product rating records to cache
+        """
+        self._shelf[self._key(merchant_id, sku, period_days)] = (time.time(), products)
+
+    def close(self) -> None:
+        """Flush and close the cache file."""
+        self._shelf.close()
+
+    def __enter__(self) -> "RatingsCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -4,38 +4,46 @@ import argparse
 import logging
 import sys
 
-from pipeline.extract import run_dlt
-from pipeline.settings import (
-    DEFAULT_INCLUDE_RATINGS,
-    DEFAULT_MAX_PAGES,
-    DEFAULT_MERCHANT_ID,
-    DEFAULT_PERIOD_DAYS,
-)
-
-# Configure logging
-logger = logging.getLogger(__name__)
+# Configure logging; named explicitly because __name__ is "__main__" under python -m,
+# which would fall outside the "pipeline" logger that setup_logging enables
+logger = logging.getLogger("pipeline.cli")
 
 
 def setup_logging(verbose: bool = False) -> None:
     """
     Configure logging for the application.
 
+    Only the pipeline package logs at INFO/DEBUG; third-party libraries (urllib3,
+    dlt, duckdb) stay at WARNING so their records are dropped by the cheap
+    isEnabledFor check instead of being formatted and written.
+
     Args:
-        verbose: If True, set log level to DEBUG; otherwise INFO
+        verbose: If True, set pipeline log level to DEBUG; otherwise INFO
     """
     log_level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(
-        level=log_level,
+        level=logging.WARNING,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
+    logging.getLogger("pipeline").setLevel(log_level)
 
 
-def main() -> None:
-    """Main CLI entry point."""
-    parser = argparse.ArgumentParser(description="Run Feefo data pipeline")
+def _build_run_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    """
+    Register the run subcommand with all of its arguments.
 
-    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+    Args:
+        subparsers: Subparsers action to add the run command to
+    """
+    from pipeline.settings import (
+        DEFAULT_INCLUDE_RATINGS,
+        DEFAULT_MAX_PAGES,
+        DEFAULT_MERCHANT_ID,
+        DEFAULT_PERIOD_DAYS,
+        DEFAULT_STREAM_RATINGS,
+        DEFAULT_USE_CACHE,
+    )
 
     # Run command
     run_parser = subparsers.add_parser("run", help="Run the pipeline")
@@ -71,6 +79,19 @@ def main() -> None:
         action="store_false",
         help="Skip fetching product ratings",
     )
+    run_parser.add_argument(
+        "--stream-ratings",
+        dest="stream_ratings",
+        action="store_true",
+        default=DEFAULT_STREAM_RATINGS,
+        help="Fetch product ratings while reviews stream in (default: enabled)",
+    )
+    run_parser.add_argument(
+        "--no-stream-ratings",
+        dest="stream_ratings",
+        action="store_false",
+        help="Load reviews first, then fetch ratings for the distinct SKUs in DuckDB",
+    )
     run_parser.add_argument(
         "--period-days",
         type=int,
@@ -89,6 +110,13 @@ def main() -> None:
         default=None,
         help="End date filter (optional)",
     )
+    run_parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        default=DEFAULT_USE_CACHE,
+        help="Always fetch product ratings from the API instead of the on-disk cache",
+    )
     run_parser.add_argument(
         "-v",
         "--verbose",
@@ -96,14 +124,30 @@ def main() -> None:
         help="Enable verbose logging (DEBUG level)",
     )
 
-    args = parser.parse_args()
 
-    # Setup logging based on verbosity
-    setup_logging(verbose=getattr(args, "verbose", False))
+def main() -> None:
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(description="Run Feefo data pipeline")
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    # Only build the full run parser (and load settings) when the run command is invoked
+    if "run" in sys.argv[1:]:
+        _build_run_parser(subparsers)
+    else:
+        subparsers.add_parser("run", help="Run the pipeline")
+
+    args = parser.parse_args()
 
     if args.command == "run":
+        # Setup logging based on verbosity (only the run command logs anything)
+        setup_logging(verbose=args.verbose)
+
         try:
             logger.info("Starting pipeline execution")
+            # Imported here so --help and argument errors don't pay for dlt/requests
+            from pipeline.extract import run_dlt
+
             run_dlt(
                 merchant_id=args.merchant_id,
                 mode=args.mode,
@@ -112,6 +156,8 @@ def main() -> None:
                 period_days=args.period_days,
                 since=args.since,
                 until=args.until,
+                use_cache=args.use_cache,
+                stream_ratings=args.stream_ratings,
             )
             logger.info("Pipeline execution completed successfully")
         except Exception as e:
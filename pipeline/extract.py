@@ -1,96 +1,341 @@
 """Extract functions for Feefo API data ingestion."""
 
+import functools
 import logging
-from collections.abc import Generator
-from typing import Any
+import os
+import re
+import threading
+from collections.abc import Generator, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import TYPE_CHECKING, Any
 
 import dlt
-import requests
-from dlt.sources.helpers.rest_client.paginators import PageNumberPaginator
-from dlt.sources.rest_api import rest_api_source
 
+from pipeline.cache import RatingsCache
 from pipeline.settings import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_FETCH_CONCURRENCY,
     DEFAULT_INCLUDE_RATINGS,
+    DEFAULT_MAX_IN_FLIGHT_BATCHES,
     DEFAULT_MAX_PAGES,
     DEFAULT_MERCHANT_ID,
     DEFAULT_PERIOD_DAYS,
+    DEFAULT_STREAM_RATINGS,
+    DEFAULT_USE_CACHE,
     FEEFO_API_BASE_URL,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_STATUSES,
+    LOADER_FILE_FORMAT,
 )
 
+if TYPE_CHECKING:
+    import requests
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+FEEFO_RATINGS_URL = f"{FEEFO_API_BASE_URL}/products/ratings"
+
+# Write modes accepted by run_dlt (identical to DLT write dispositions)
+VALID_MODES = frozenset({"merge", "replace", "append"})
+
+# Sentiment keywords mapped to their category, so each review word costs one lookup
+_KEYWORD_SENTIMENT = {
+    **dict.fromkeys(("excellent", "amazing", "love", "perfect", "beautiful", "great", "fantastic"), "positive"),
+    **dict.fromkeys(("disappointed", "poor", "terrible", "awful", "broken", "bad", "worst"), "negative"),
+}
+
+# Whole-word match of any sentiment keyword, scanned in a single pass
+# (matched against lowercased text, so every match is an exact _KEYWORD_SENTIMENT key)
+_KEYWORD_PATTERN = re.compile(rf"\b(?:{'|'.join(_KEYWORD_SENTIMENT)})\b")
+
+# Shared HTTP session, created on first use so importing this module stays cheap
+_SESSION: "requests.Session | None" = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session() -> "requests.Session":
+    """
+    Return the shared HTTP session used for Feefo API calls.
+
+    The session keeps connections alive between calls so each SKU lookup reuses
+    the same TCP+TLS connection, and retries transient failures with backoff.
+
+    Returns:
+        Configured requests session
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=HTTP_MAX_RETRIES,
+                    backoff_factor=HTTP_RETRY_BACKOFF,
+                    status_forcelist=HTTP_RETRY_STATUSES,
+                    allowed_methods=["GET"],
+                    # Hand the last response back so raise_for_status() reports the HTTP error
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.headers["Connection"] = "keep-alive"
+                _SESSION = session
+    return _SESSION
+
+
+def _ratings_base_params(merchant_id: str, period_days: int | None = None) -> dict[str, str]:
+    """
+    Build the ratings query parameters shared by every request in a run.
+
+    Args:
+        merchant_id: Merchant identifier
+        period_days: Optional number of days to filter ratings (e.g., 30 for last 30 days)
+
+    Returns:
+        Query parameters without product_sku
+    """
+    params = {"merchant_identifier": merchant_id}
+
+    # Add period filter if specified
+    if period_days:
+        params["since_period"] = f"{period_days}days"
+
+    return params
+
+
+def _fetch_ratings_batch(
+    session: "requests.Session", base_params: dict[str, str], skus: list[str]
+) -> list[dict[str, Any]]:
+    """
+    Fetch and categorise product ratings for a batch of SKUs in one request.
+
+    The SKUs are sent as a comma-separated product_sku list. If the API rejects
+    the list with a 400, the batch falls back to one request per SKU. Other
+    errors are logged and swallowed so one failing batch doesn't stop the others.
+
+    Args:
+        session: Shared HTTP session
+        base_params: Shared query parameters from _ratings_base_params
+        skus: Product SKUs to look up
+
+    Returns:
+        Product rating records for the SKUs (empty on error or no data)
+    """
+    import orjson
+    import requests
+
+    sku_param = ",".join(skus)
+    logger.debug("Fetching ratings for SKUs: %s", sku_param)
+
+    params = {**base_params, "product_sku": sku_param}
+
+    try:
+        response = session.get(FEEFO_RATINGS_URL, params=params, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        response.raise_for_status()
+        # orjson decodes the raw bytes several times faster than response.json()
+        data = orjson.loads(response.content)
+    except requests.exceptions.HTTPError as e:
+        if len(skus) > 1 and e.response is not None and e.response.status_code == 400:
+            logger.warning("Batched ratings request rejected, falling back to per-SKU requests: %s", e)
+            return [product for sku in skus for product in _fetch_ratings_batch(session, base_params, [sku])]
+        logger.error("HTTP error fetching ratings for SKUs %s: %s", sku_param, e)
+        return []
+    except requests.exceptions.RequestException as e:
+        logger.error("Request error fetching ratings for SKUs %s: %s", sku_param, e)
+        return []
+    except ValueError as e:
+        logger.error("JSON decode error for SKUs %s: %s", sku_param, e)
+        return []
+
+    products: list[dict[str, Any]] = data.get("products") or []
+    if not products:
+        logger.warning("No product data found for SKUs: %s", sku_param)
+        return []
+
+    # Add sentiment category based on rating and reviews
+    for product in products:
+        product["category"] = categorise_review(
+            rating=product.get("average_rating"),
+            review=product.get("review_text", ""),
+        )
+    logger.debug("Successfully fetched ratings for %d SKUs", len(skus))
+    return products
+
+
+def _cache_products(
+    cache: RatingsCache, merchant_id: str, period_days: int | None, products: list[dict[str, Any]]
+) -> None:
+    """
+    Write fetched product ratings back to the cache, grouped per SKU.
+
+    Only SKUs the API returned are cached; missing ones are retried next run.
+
+    Args:
+        cache: Ratings cache to write to
+        merchant_id: Merchant identifier
+        period_days: Ratings period filter the records were fetched with
+        products: Product rating records from one batch
+    """
+    products_by_sku: dict[str, list[dict[str, Any]]] = {}
+    for product in products:
+        if product.get("sku"):
+            products_by_sku.setdefault(product["sku"], []).append(product)
+    for sku, sku_products in products_by_sku.items():
+        cache.set(merchant_id, sku, period_days, sku_products)
+
+
+def fetch_products_for_skus(
+    merchant_id: str,
+    skus: Iterable[str],
+    period_days: int | None = None,
+    max_workers: int = DEFAULT_FETCH_CONCURRENCY,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: RatingsCache | None = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT_BATCHES,
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Fetch product ratings for a stream of unique SKUs concurrently.
+
+    SKUs are grouped into batches of batch_size, one request per batch. Each
+    batch is submitted to a bounded thread pool (sharing the pooled session)
+    as soon as it fills, so when skus is a lazy iterator, reading more SKUs
+    overlaps with the requests already in flight. At most max_in_flight
+    batches are pending at once; when the limit is hit, the oldest results
+    are drained before reading on. Results are yielded as they complete,
+    not in input order.
+
+    When a cache is given, SKUs with a fresh cache entry are served from it
+    and only the misses hit the API. Fetched records are written back per SKU.
+
+    Args:
+        merchant_id: Merchant identifier
+        skus: Unique SKUs to look up (list or lazy iterator)
+        period_days: Optional number of days to filter ratings (e.g., 30 for last 30 days)
+        max_workers: Maximum number of concurrent requests
+        batch_size: Maximum number of SKUs per request
+        cache: Optional ratings cache to read from and write to
+        max_in_flight: Maximum number of submitted batches awaiting collection
+
+    Yields:
+        Product rating data for the given SKUs
+    """
+    session = _get_session()
+    base_params = _ratings_base_params(merchant_id, period_days)
+    batch: list[str] = []
+    in_flight: set[Future[list[dict[str, Any]]]] = set()
+
+    def collect(futures: Iterable[Future[list[dict[str, Any]]]]) -> Generator[dict[str, Any], None, None]:
+        """Yield the products of completed batches, writing them to the cache."""
+        for future in futures:
+            products = future.result()
+            if cache is not None:
+                _cache_products(cache, merchant_id, period_days, products)
+            yield from products
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for sku in skus:
+            if cache is not None:
+                cached = cache.get(merchant_id, sku, period_days)
+                if cached is not None:
+                    yield from cached
+                    continue
+
+            batch.append(sku)
+            if len(batch) < batch_size:
+                continue
+
+            in_flight.add(executor.submit(_fetch_ratings_batch, session, base_params, batch))
+            batch = []
+
+            # Apply backpressure once too many batches are pending, otherwise
+            # just pick up whatever has finished while SKUs were being read
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            else:
+                done = {future for future in in_flight if future.done()}
+                in_flight -= done
+            yield from collect(done)
+
+        # Flush the last partial batch and drain everything still pending
+        if batch:
+            in_flight.add(executor.submit(_fetch_ratings_batch, session, base_params, batch))
+        yield from collect(as_completed(in_flight))
+
+
+def _iter_new_skus(reviews_resource: Any, seen_skus: set[str]) -> Generator[str, None, None]:
+    """
+    Lazily yield each SKU referenced by the reviews the first time it is seen.
+
+    Args:
+        reviews_resource: The reviews resource to read from
+        seen_skus: Set of already seen SKUs, updated in place
+
+    Yields:
+        SKUs not seen before
+    """
+    # Bind the set's add method once; this loop runs for every review product
+    mark_seen = seen_skus.add
+
+    # Process reviews as they come through
+    for review in reviews_resource:
+        # Extract products from nested structure
+        for product in review.get("products") or ():
+            # Get SKU from nested product structure; entries without one are rare
+            try:
+                sku = product["product"]["sku"]
+            except (KeyError, TypeError):
+                continue
+
+            # Only fetch each SKU once
+            if sku and sku not in seen_skus:
+                mark_seen(sku)
+                yield sku
+
 
 @dlt.resource(name="feefo_products_for_reviews", write_disposition="merge", primary_key="sku")
 def fetch_products_from_reviews(
-    merchant_id: str, reviews_resource: Any, period_days: int | None = None
+    merchant_id: str, reviews_resource: Any, period_days: int | None = None, use_cache: bool = DEFAULT_USE_CACHE
 ) -> Generator[dict[str, Any], None, None]:
     """
     Transformer that extracts SKUs from reviews and fetches product ratings.
 
+    New SKUs are streamed lazily into fetch_products_for_skus, so review
+    pages keep being read while earlier rating batches are in flight.
+
     Args:
         merchant_id: Merchant identifier
         reviews_resource: The reviews resource to transform
         period_days: Optional number of days to filter ratings (e.g., 30 for last 30 days)
+        use_cache: Whether to serve and store ratings via the on-disk RatingsCache (default: True)
 
     Yields:
         Product rating data for SKUs found in reviews
     """
     seen_skus: set[str] = set()
+    cache = RatingsCache() if use_cache else None
     logger.info("Starting product rating enrichment for merchant: %s", merchant_id)
 
-    # Process reviews as they come through
-    for review in reviews_resource:
-        # Extract products from nested structure
-        products = review.get("products", [])
-
-        for product in products:
-            # Get SKU from nested product structure
-            product_data = product.get("product", {})
-            sku = product_data.get("sku")
-
-            # Only fetch each SKU once
-            if sku and sku not in seen_skus:
-                seen_skus.add(sku)
-                logger.debug("Fetching ratings for SKU: %s", sku)
-
-                url = f"{FEEFO_API_BASE_URL}/products/ratings"
-                params = {
-                    "merchant_identifier": merchant_id,
-                    "product_sku": sku,
-                }
-
-                # Add period filter if specified
-                if period_days:
-                    params["since_period"] = f"{period_days}days"
-
-                try:
-                    response = requests.get(url, params=params, timeout=30)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    # Yield product ratings with sentiment analysis
-                    if "products" in data and data["products"]:
-                        for product in data["products"]:
-                            # Add sentiment category based on rating and reviews
-                            product["category"] = categorise_review(
-                                rating=product.get("average_rating"),
-                                review=product.get("review_text", ""),
-                            )
-                            yield product
-                        logger.debug("Successfully fetched ratings for SKU: %s", sku)
-                    else:
-                        logger.warning("No product data found for SKU: %s", sku)
-
-                except requests.exceptions.HTTPError as e:
-                    logger.error("HTTP error fetching ratings for SKU %s: %s", sku, e)
-                    # Continue processing other SKUs
-                except requests.exceptions.RequestException as e:
-                    logger.error("Request error fetching ratings for SKU %s: %s", sku, e)
-                    # Continue processing other SKUs
-                except ValueError as e:
-                    logger.error("JSON decode error for SKU %s: %s", sku, e)
-                    # Continue processing other SKUs
+    try:
+        yield from fetch_products_for_skus(
+            merchant_id, _iter_new_skus(reviews_resource, seen_skus), period_days, cache=cache
+        )
+    finally:
+        if cache is not None:
+            cache.close()
 
     logger.info("Completed product rating enrichment. Total unique SKUs processed: %d", len(seen_skus))
 
@@ -103,6 +348,7 @@ def feefo_source(
     period_days: int | None = DEFAULT_PERIOD_DAYS,
     since: str | None = None,
     until: str | None = None,
+    use_cache: bool = DEFAULT_USE_CACHE,
 ) -> tuple[Any, ...]:
     """
     Create a DLT source for Feefo reviews and products.
@@ -114,11 +360,16 @@ def feefo_source(
         period_days: Filter ratings by days (e.g., 30 for last 30 days, None for all time)
         since: Optional start date filter
         until: Optional end date filter
+        use_cache: Whether to cache product ratings on disk between runs (default: True)
 
     Returns:
         Tuple of DLT resources (reviews, and optionally products)
         Note: Return type uses Any due to DLT's dynamic resource system
     """
+    # The REST API source pulls in its own client/paginator stack, so only import it when building the source
+    from dlt.sources.helpers.rest_client.paginators import PageNumberPaginator
+    from dlt.sources.rest_api import rest_api_source
+
     # Build query parameters
     params = {"merchant_identifier": merchant_id}
     if since:
@@ -156,7 +407,7 @@ def feefo_source(
 
     # Conditionally create products resource (with sentiment analysis included)
     if include_ratings:
-        products = fetch_products_from_reviews(merchant_id, reviews, period_days)
+        products = fetch_products_from_reviews(merchant_id, reviews, period_days, use_cache)
         return reviews, products
     else:
         return (reviews,)
@@ -178,10 +429,6 @@ def categorise_review(rating: float | None = None, review: str = "") -> str:
     Returns:
         Sentiment category: 'positive', 'neutral', or 'negative'
     """
-    # Define sentiment keywords
-    positive_keywords = ("excellent", "amazing", "love", "perfect", "beautiful", "great", "fantastic")
-    negative_keywords = ("disappointed", "poor", "terrible", "awful", "broken", "bad", "worst")
-
     # Priority 1: Use rating if available
     if rating is not None:
         if rating >= 4:
@@ -191,19 +438,90 @@ def categorise_review(rating: float | None = None, review: str = "") -> str:
         else:
             return "negative"
 
-    # Priority 2: Scan review text for keywords
-    review_lower = review.lower()
-    review_words = review_lower.split()
-    for word in review_words:
-        if word in positive_keywords:
-            return "positive"
-        elif word in negative_keywords:
-            return "negative"
+    # Nothing to scan
+    if not review:
+        return "neutral"
+
+    # Priority 2: Scan review text for keywords, the first keyword found wins
+    match = _KEYWORD_PATTERN.search(review.lower())
+    if match:
+        return _KEYWORD_SENTIMENT[match.group()]
 
     # Default: neutral
     return "neutral"
 
 
+@functools.lru_cache(maxsize=4)
+def _get_pipeline(pipeline_name: str, db_path: str, dataset_name: str) -> Any:
+    """
+    Return the DLT pipeline for a DuckDB database, creating it on first use.
+
+    Repeat run_dlt calls in the same process (and the second load of the
+    two-phase ratings mode) reuse one pipeline object instead of re-creating
+    the database directory and re-running pipeline and destination
+    initialisation.
+
+    Args:
+        pipeline_name: DLT pipeline name
+        db_path: Path to the DuckDB database file
+        dataset_name: Dataset (schema) to load into
+
+    Returns:
+        DLT pipeline instance
+    """
+    # Only runs on a cache miss, so the directory is checked once per database
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+        logger.info("Database directory created/verified: %s", db_dir)
+
+    logger.info("Creating DLT pipeline with database: %s", db_path)
+    return dlt.pipeline(
+        pipeline_name=pipeline_name,
+        destination=dlt.destinations.duckdb(db_path),
+        dataset_name=dataset_name,
+    )
+
+
+def load_review_skus(pipeline: Any, load_ids: list[str]) -> list[str]:
+    """
+    Read the distinct product SKUs referenced by reviews from the given loads.
+
+    Deduplication happens in DuckDB, so SKUs never have to be collected from
+    the nested review records in Python.
+
+    Args:
+        pipeline: DLT pipeline that loaded the reviews
+        load_ids: DLT load ids to read reviews from (usually the current run)
+
+    Returns:
+        Distinct, sorted product SKUs
+    """
+    if not load_ids:
+        return []
+
+    # DLT only creates the child table once some review has products (service-only reviews have none)
+    products_schema = pipeline.default_schema.tables.get("feefo_reviews__products", {})
+    if "product__sku" not in products_schema.get("columns", {}):
+        logger.info("No product SKUs loaded yet, skipping ratings fetch")
+        return []
+
+    with pipeline.sql_client() as client:
+        products_table = client.make_qualified_table_name("feefo_reviews__products")
+        reviews_table = client.make_qualified_table_name("feefo_reviews")
+        placeholders = ", ".join(["%s"] * len(load_ids))
+        query = f"""
+            SELECT DISTINCT p.product__sku
+            FROM {products_table} AS p
+            JOIN {reviews_table} AS r ON p._dlt_root_id = r._dlt_id
+            WHERE p.product__sku IS NOT NULL AND r._dlt_load_id IN ({placeholders})
+            ORDER BY p.product__sku
+        """
+        rows = client.execute_sql(query, *load_ids)
+
+    return [sku for (sku,) in rows or []]
+
+
 def run_dlt(
     merchant_id: str = DEFAULT_MERCHANT_ID,
     mode: str = "merge",
@@ -212,6 +530,8 @@ def run_dlt(
     period_days: int | None = DEFAULT_PERIOD_DAYS,
     since: str | None = None,
     until: str | None = None,
+    use_cache: bool = DEFAULT_USE_CACHE,
+    stream_ratings: bool = DEFAULT_STREAM_RATINGS,
 ) -> None:
     """
     Run DLT pipeline to load Feefo data into DuckDB.
@@ -224,6 +544,9 @@ def run_dlt(
         period_days: Filter ratings by days (e.g., 30 for last 30 days, None for all time)
         since: Optional start date filter
         until: Optional end date filter
+        use_cache: Whether to cache product ratings on disk between runs (default: True)
+        stream_ratings: Fetch ratings while reviews stream in (default: True). If False, load
+            reviews first, then fetch ratings for the distinct SKUs queried from DuckDB
 
     Raises:
         ValueError: If mode is not one of 'merge', 'replace', or 'append'
@@ -231,49 +554,38 @@ def run_dlt(
     """
     logger.info("Starting DLT pipeline run")
     logger.info("Parameters: merchant_id=%s, mode=%s, max_pages=%d", merchant_id, mode, max_pages)
-    logger.info("Options: include_ratings=%s, period_days=%s", include_ratings, period_days)
-
-    # Map mode to write_disposition
-    write_disposition_map = {
-        "merge": "merge",
-        "replace": "replace",
-        "append": "append",
-    }
-
-    if mode not in write_disposition_map:
+    logger.info(
+        "Options: include_ratings=%s, period_days=%s, use_cache=%s, stream_ratings=%s",
+        include_ratings,
+        period_days,
+        use_cache,
+        stream_ratings,
+    )
+
+    # Modes map one-to-one onto DLT write dispositions
+    if mode not in VALID_MODES:
         error_msg = f"Invalid mode: {mode}. Must be one of: merge, replace, append"
         logger.error(error_msg)
         raise ValueError(error_msg)
 
-    write_disposition = write_disposition_map[mode]
+    write_disposition = mode
 
     try:
         # Create pipeline
-        import os
-
         # Use environment variable for database path (for test isolation)
         db_path = os.getenv("DUCKDB_PATH", "data/feefo_pipeline.duckdb")
-        db_dir = os.path.dirname(db_path)
-        if db_dir:
-            os.makedirs(db_dir, exist_ok=True)
-            logger.info("Database directory created/verified: %s", db_dir)
-
-        logger.info("Creating DLT pipeline with database: %s", db_path)
-        pipeline = dlt.pipeline(
-            pipeline_name="feefo_pipeline",
-            destination=dlt.destinations.duckdb(db_path),
-            dataset_name="bronze",
-        )
+        pipeline = _get_pipeline("feefo_pipeline", db_path, "bronze")
 
-        # Get source with reviews and optionally products
+        # Get source with reviews and optionally products (streamed through the transformer)
         logger.info("Configuring data source")
         source = feefo_source(
             merchant_id=merchant_id,
             max_pages=max_pages,
-            include_ratings=include_ratings,
+            include_ratings=include_ratings and stream_ratings,
             period_days=period_days,
             since=since,
             until=until,
+            use_cache=use_cache,
         )
 
         # Apply write disposition to all resources
@@ -287,10 +599,30 @@ def run_dlt(
         else:
             logger.info("Loading Feefo reviews (skipping product ratings)...")
 
-        load_info = pipeline.run(source)
-        logger.info("Pipeline execution completed successfully")
+        load_info = pipeline.run(source, loader_file_format=LOADER_FILE_FORMAT)
         logger.info("Load info: %s", load_info)
 
+        if include_ratings and not stream_ratings:
+            # Second phase: fetch ratings for the SKUs DuckDB found in this run's reviews
+            skus = load_review_skus(pipeline, load_info.loads_ids)
+            logger.info("Loading product ratings for %d distinct SKUs...", len(skus))
+
+            cache = RatingsCache() if use_cache else None
+            try:
+                products = dlt.resource(  # type: ignore[call-overload]
+                    fetch_products_for_skus(merchant_id, skus, period_days, cache=cache),
+                    name="feefo_products_for_reviews",
+                    write_disposition=write_disposition,
+                    primary_key="sku",
+                )
+                load_info = pipeline.run(products, loader_file_format=LOADER_FILE_FORMAT)
+                logger.info("Load info: %s", load_info)
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        logger.info("Pipeline execution completed successfully")
+
     except ValueError:
         # Re-raise ValueError (already logged above)
         raise
@@ -13,3 +13,25 @@ DEFAULT_PAGE_SIZE: int = 100
 # Product ratings defaults
 DEFAULT_INCLUDE_RATINGS: bool = True
 DEFAULT_PERIOD_DAYS: int | None = None  # None = all time (API default)
+DEFAULT_STREAM_RATINGS: bool = True  # False = load reviews first, then fetch ratings for SKUs in DuckDB
+
+# Product ratings fetch concurrency
+DEFAULT_FETCH_CONCURRENCY: int = 8  # Concurrent rating requests
+DEFAULT_MAX_IN_FLIGHT_BATCHES: int = 16  # Pending ratings batches before reading more SKUs blocks
+DEFAULT_BATCH_SIZE: int = 50  # SKUs per ratings request (comma-separated product_sku)
+
+# Ratings cache defaults
+DEFAULT_USE_CACHE: bool = True
+DEFAULT_CACHE_TTL_SECONDS: int = 3600
+
+# Load package format; DuckDB bulk-loads jsonl files instead of running row INSERTs
+LOADER_FILE_FORMAT: str = "jsonl"
+
+# HTTP client defaults
+HTTP_CONNECT_TIMEOUT: float = 3.05
+HTTP_READ_TIMEOUT: float = 30
+HTTP_MAX_RETRIES: int = 5
+HTTP_RETRY_BACKOFF: float = 0.3
+HTTP_RETRY_STATUSES: tuple[int, ...] = (429, 500, 502, 503, 504)
+HTTP_POOL_CONNECTIONS: int = 16
+HTTP_POOL_MAXSIZE: int = 32
@@ -21,6 +21,7 @@ PERIOD_DAYS="${PERIOD_DAYS:-}"
 SINCE="${SINCE:-}"
 UNTIL="${UNTIL:-}"
 INCLUDE_RATINGS="${INCLUDE_RATINGS:-1}"
+USE_CACHE="${USE_CACHE:-1}"
 
 echo "Running DLT ingestion..."
 
@@ -47,6 +48,10 @@ if [[ "${INCLUDE_RATINGS}" == "0" ]]; then
     DLT_CMD+=(--no-include-ratings)
 fi
 
+if [[ "${USE_CACHE}" == "0" ]]; then
+    DLT_CMD+=(--no-cache)
+fi
+
 "${UV_RUN[@]}" "${DLT_CMD[@]}"
 
 echo "Running dbt transforms..."
@@ -2,10 +2,13 @@
 
 from pathlib import Path
 from typing import Any, Callable, Generator
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
 
+import orjson
 import pytest
 
+from pipeline.extract import _get_pipeline
+
 
 @pytest.fixture
 def tmp_duckdb_path(tmp_path: Path) -> Generator[str, None, None]:
@@ -23,6 +26,21 @@ def tmp_duckdb_path(tmp_path: Path) -> Generator[str, None, None]:
     # Cleanup happens automatically with tmp_path
 
 
+@pytest.fixture(autouse=True)
+def isolated_ratings_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """
+    Keep the ratings cache out of the working tree and fresh per test.
+
+    The cache is on by default, so this also covers tests that call the
+    transformer directly without mock_env.
+
+    Args:
+        monkeypatch: pytest's monkeypatch fixture
+        tmp_path: pytest's built-in tmp_path fixture
+    """
+    monkeypatch.setenv("FEEFO_CACHE_PATH", str(tmp_path / "test_feefo_ratings_cache"))
+
+
 @pytest.fixture
 def mock_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Generator[None, None, None]:
     """
@@ -47,6 +65,9 @@ def mock_env(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Generator[None,
 
     yield
 
+    # Drop pipelines pointing at this test's temp directory so they don't leak into later tests
+    _get_pipeline.cache_clear()
+
     # Cleanup happens automatically with tmp_path
 
 
@@ -126,6 +147,21 @@ def mock_requests(
 
     call_tracker = MagicMock()
 
+    # Bucket calls by endpoint as they are recorded, so tests don't rescan call_args_list
+    call_tracker.reviews_calls = []
+    call_tracker.product_calls = []
+
+    def track(url: str, *args: Any, **kwargs: Any) -> None:
+        """Record a call on the tracker and in its endpoint bucket."""
+        call_tracker(url, *args, **kwargs)
+        if "reviews/all" in url:
+            call_tracker.reviews_calls.append(call(url, *args, **kwargs))
+        elif "products/ratings" in url:
+            call_tracker.product_calls.append(call(url, *args, **kwargs))
+
+    # Encode each reviews page once per test rather than on every request
+    encoded_pages: dict[int, bytes] = {}
+
     def create_mock_response(url: str, params: dict[str, Any] | None = None) -> Response:
         """Create a proper Response object with mocked data."""
         response = Response()
@@ -139,14 +175,15 @@ def mock_requests(
             # Convert page to int if it's a string
             if isinstance(page, str):
                 page = int(page)
-            response_data = mock_reviews_response(page)
-            import json
-
-            response._content = json.dumps(response_data).encode("utf-8")
+            if page not in encoded_pages:
+                encoded_pages[page] = orjson.dumps(mock_reviews_response(page))
+            response._content = encoded_pages[page]
         elif "products/ratings" in url:
-            import json
-
-            response._content = json.dumps(mock_product_ratings_response).encode("utf-8")
+            # Echo back one product per requested SKU, like the real API
+            template = mock_product_ratings_response["products"][0]
+            skus = params.get("product_sku", template["sku"]) if params else template["sku"]
+            response_data = {"products": [{**template, "sku": sku} for sku in skus.split(",")]}
+            response._content = orjson.dumps(response_data)
         else:
             response._content = b"{}"
 
@@ -156,7 +193,7 @@ def mock_requests(
     def mock_get(url: str, *args: Any, **kwargs: Any) -> Response:
         """Mock requests.get with tracking."""
         params = kwargs.get("params", {})
-        call_tracker(url, *args, **kwargs)
+        track(url, *args, **kwargs)
         return create_mock_response(url, params)
 
     def mock_session_send(self: Any, request: Any, **kwargs: Any) -> Response:
@@ -167,7 +204,7 @@ def mock_requests(
         parsed = urlparse(request.url)
         params = {k: v[0] if len(v) == 1 else v for k, v in parse_qs(parsed.query).items()}
 
-        call_tracker(request.url, params=params, **kwargs)
+        track(request.url, params=params, **kwargs)
         return create_mock_response(request.url, params)
 
     # Patch both requests.get and Session.send to cover all cases
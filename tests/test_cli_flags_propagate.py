@@ -1,11 +1,13 @@
 """Test that CLI flags correctly propagate to the pipeline functions."""
 
+import logging
+import subprocess
 import sys
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from pipeline.cli import main
+from pipeline.cli import main, setup_logging
 
 
 def test_cli_run_command_propagates_flags(monkeypatch: MagicMock) -> None:
@@ -16,7 +18,7 @@ def test_cli_run_command_propagates_flags(monkeypatch: MagicMock) -> None:
         monkeypatch: pytest's monkeypatch fixture
     """
     # Mock run_dlt to track calls
-    with patch("pipeline.cli.run_dlt") as mock_run_dlt:
+    with patch("pipeline.extract.run_dlt") as mock_run_dlt:
         # Simulate CLI args
         test_args = [
             "cli.py",
@@ -34,6 +36,8 @@ def test_cli_run_command_propagates_flags(monkeypatch: MagicMock) -> None:
             "2024-01-01",
             "--until",
             "2024-12-31",
+            "--no-cache",
+            "--no-stream-ratings",
         ]
         monkeypatch.setattr(sys, "argv", test_args)
 
@@ -49,6 +53,8 @@ def test_cli_run_command_propagates_flags(monkeypatch: MagicMock) -> None:
             period_days=30,
             since="2024-01-01",
             until="2024-12-31",
+            use_cache=False,
+            stream_ratings=False,
         )
 
 
@@ -59,7 +65,7 @@ def test_cli_defaults_propagate(monkeypatch: MagicMock) -> None:
     Args:
         monkeypatch: pytest's monkeypatch fixture
     """
-    with patch("pipeline.cli.run_dlt") as mock_run_dlt:
+    with patch("pipeline.extract.run_dlt") as mock_run_dlt:
         # Simulate CLI args with only run command (use all defaults)
         test_args = ["cli.py", "run"]
         monkeypatch.setattr(sys, "argv", test_args)
@@ -77,6 +83,8 @@ def test_cli_defaults_propagate(monkeypatch: MagicMock) -> None:
         assert call_kwargs["period_days"] is None
         assert call_kwargs["since"] is None
         assert call_kwargs["until"] is None
+        assert call_kwargs["use_cache"] is True
+        assert call_kwargs["stream_ratings"] is True
 
 
 @pytest.mark.parametrize(
@@ -96,7 +104,7 @@ def test_cli_include_ratings_flag(monkeypatch: MagicMock, flags: list[str], expe
         flags: List of flags to pass (can be empty for default)
         expected_value: Expected value of include_ratings
     """
-    with patch("pipeline.cli.run_dlt") as mock_run_dlt:
+    with patch("pipeline.extract.run_dlt") as mock_run_dlt:
         test_args = ["cli.py", "run"] + flags
         monkeypatch.setattr(sys, "argv", test_args)
 
@@ -117,7 +125,7 @@ def test_cli_mode_choices(monkeypatch: MagicMock, mode: str) -> None:
         monkeypatch: pytest's monkeypatch fixture
         mode: The mode to test (parametrized)
     """
-    with patch("pipeline.cli.run_dlt") as mock_run_dlt:
+    with patch("pipeline.extract.run_dlt") as mock_run_dlt:
         test_args = ["cli.py", "run", "--mode", mode]
         monkeypatch.setattr(sys, "argv", test_args)
 
@@ -149,7 +157,7 @@ def test_cli_int_type_conversion(
         expected_value: Expected integer value
         kwarg_name: Keyword argument name in run_dlt
     """
-    with patch("pipeline.cli.run_dlt") as mock_run_dlt:
+    with patch("pipeline.extract.run_dlt") as mock_run_dlt:
         test_args = ["cli.py", "run", flag_name, flag_value]
         monkeypatch.setattr(sys, "argv", test_args)
 
@@ -160,3 +168,64 @@ def test_cli_int_type_conversion(
         call_kwargs = mock_run_dlt.call_args.kwargs
         assert isinstance(call_kwargs[kwarg_name], int)
         assert call_kwargs[kwarg_name] == expected_value
+
+
+def test_cli_help_does_not_import_dlt() -> None:
+    """
+    Test that printing help does not import the heavy pipeline dependencies.
+
+    Runs in a subprocess so modules imported by other tests don't leak in.
+    """
+    code = (
+        "import logging\n"
+        "import sys\n"
+        "from pipeline.cli import main\n"
+        "sys.argv = ['cli.py']\n"
+        "main()\n"
+        "assert 'dlt' not in sys.modules, 'dlt was imported'\n"
+        "assert 'requests' not in sys.modules, 'requests was imported'\n"
+        "assert 'pipeline.settings' not in sys.modules, 'pipeline.settings was imported'\n"
+        "assert not logging.getLogger().handlers, 'logging was configured'\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_cli_run_as_main_logs_progress() -> None:
+    """
+    Test that running the CLI as a module (python -m pipeline.cli) still emits its INFO messages.
+
+    Runs in a subprocess so the module executes as __main__ with a fresh logging setup.
+    """
+    code = (
+        "import runpy\n"
+        "import sys\n"
+        "from unittest.mock import patch\n"
+        "sys.argv = ['cli.py', 'run']\n"
+        "with patch('pipeline.extract.run_dlt'):\n"
+        "    runpy.run_module('pipeline.cli', run_name='__main__')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert "Starting pipeline execution" in result.stderr
+    assert "Pipeline execution completed successfully" in result.stderr
+
+
+@pytest.mark.parametrize("verbose,expected_level", [(True, logging.DEBUG), (False, logging.INFO)])
+def test_setup_logging_scopes_level_to_pipeline(verbose: bool, expected_level: int) -> None:
+    """
+    Test that verbosity only changes the pipeline package logger level.
+
+    Args:
+        verbose: Whether verbose logging is requested
+        expected_level: Expected level of the pipeline logger
+    """
+    pipeline_logger = logging.getLogger("pipeline")
+    original_level = pipeline_logger.level
+    try:
+        setup_logging(verbose=verbose)
+        assert pipeline_logger.level == expected_level
+    finally:
+        pipeline_logger.setLevel(original_level)
@@ -5,7 +5,8 @@ from unittest.mock import MagicMock
 import duckdb
 import pytest
 
-from pipeline.extract import run_dlt
+from pipeline.extract import _get_pipeline, run_dlt
+from pipeline.settings import LOADER_FILE_FORMAT
 
 
 def get_db_path() -> str:
@@ -74,3 +75,55 @@ def test_write_disposition_behavior(
         ), f"{mode.capitalize()} mode should be idempotent (same count after second run)"
     elif expected_behavior == "additive":
         assert second_count == first_count * 2, f"{mode.capitalize()} mode should double the data on second run"
+
+
+def test_invalid_mode_raises_value_error(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that an unknown write mode is rejected before any API call is made.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    with pytest.raises(ValueError, match="Invalid mode: upsert"):
+        run_dlt(merchant_id="test-merchant", mode="upsert", max_pages=1, include_ratings=False)
+
+    assert mock_requests.call_count == 0
+
+
+def test_repeat_runs_reuse_pipeline(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that repeat runs against the same database reuse one DLT pipeline object.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    run_dlt(merchant_id="test-merchant", mode="merge", max_pages=1, include_ratings=False)
+    hits_before = _get_pipeline.cache_info().hits
+
+    run_dlt(merchant_id="test-merchant", mode="merge", max_pages=1, include_ratings=False)
+
+    assert _get_pipeline.cache_info().hits == hits_before + 1
+
+
+def test_rows_are_bulk_loaded_from_files(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that review tables are loaded from the configured file format instead of INSERT statements.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    import os
+
+    run_dlt(merchant_id="test-merchant", mode="replace", max_pages=1, include_ratings=False)
+
+    pipeline = _get_pipeline("feefo_pipeline", os.environ["DUCKDB_PATH"], "bronze")
+    jobs = [
+        job for package in pipeline.last_trace.last_load_info.load_packages for job in package.jobs["completed_jobs"]
+    ]
+    file_formats = {
+        job.job_file_info.file_format for job in jobs if job.job_file_info.table_name.startswith("feefo_reviews")
+    }
+    assert file_formats == {LOADER_FILE_FORMAT}
@@ -1,5 +1,6 @@
 """Test that max_pages parameter limits API pagination calls."""
 
+from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
@@ -24,7 +25,7 @@ def test_max_pages_limits_api_calls(mock_env: None, mock_requests: MagicMock) ->
     )
 
     # Count how many times the reviews API was called
-    reviews_calls = [call for call in mock_requests.call_args_list if "reviews/all" in str(call[0][0])]
+    reviews_calls = mock_requests.reviews_calls
 
     # Should only call reviews API once (page 1)
     assert len(reviews_calls) == 1, f"Expected 1 call to reviews API with max_pages=1, got {len(reviews_calls)}"
@@ -50,7 +51,7 @@ def test_max_pages_with_multiple_pages(mock_env: None, mock_requests: MagicMock)
     )
 
     # Count how many times the reviews API was called
-    reviews_calls = [call for call in mock_requests.call_args_list if "reviews/all" in str(call[0][0])]
+    reviews_calls = mock_requests.reviews_calls
 
     # Should make at least 1 call and no more than max_pages (2) calls
     assert len(reviews_calls) >= 1, f"Expected at least 1 call to reviews API, got {len(reviews_calls)}"
@@ -59,10 +60,24 @@ def test_max_pages_with_multiple_pages(mock_env: None, mock_requests: MagicMock)
     ), f"Expected no more than 2 calls to reviews API with max_pages=2, got {len(reviews_calls)}"
 
     # Verify that the page parameter was passed correctly in the first call
-    first_call_url = str(reviews_calls[0][0][0])
+    first_call_url = reviews_calls[0].args[0]
     assert "page=1" in first_call_url, "First call should request page 1"
 
 
+def test_pagination_stops_at_last_page(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that pagination stops at the API's reported page count without requesting a page past the end.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    # The mocked API reports 3 pages in summary.meta.pages
+    run_dlt(merchant_id="test-merchant", mode="merge", max_pages=5, include_ratings=False)
+
+    assert len(mock_requests.reviews_calls) == 3
+
+
 @pytest.mark.parametrize(
     "include_ratings,expected_product_calls",
     [
@@ -94,7 +109,7 @@ def test_include_ratings_controls_product_api_calls(
     )
 
     # Count product API calls
-    product_calls = [call for call in mock_requests.call_args_list if "products/ratings" in str(call[0][0])]
+    product_calls = mock_requests.product_calls
 
     # Verify expected behavior
     if expected_product_calls == "at_least_one":
@@ -103,3 +118,65 @@ def test_include_ratings_controls_product_api_calls(
         assert (
             len(product_calls) == 0
         ), f"Expected no product ratings API calls when include_ratings=False, got {len(product_calls)}"
+
+
+def test_two_phase_ratings_fetch_distinct_skus_from_duckdb(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that stream_ratings=False loads reviews first, then fetches each SKU in DuckDB once.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    import os
+
+    import duckdb
+
+    run_dlt(
+        merchant_id="test-merchant",
+        mode="merge",
+        max_pages=2,
+        include_ratings=True,
+        stream_ratings=False,
+    )
+
+    # Every SKU from the loaded reviews is requested exactly once
+    product_calls = mock_requests.product_calls
+    requested_skus = [sku for call in product_calls for sku in call.kwargs["params"]["product_sku"].split(",")]
+
+    conn = duckdb.connect(os.environ["DUCKDB_PATH"])
+    review_skus = conn.execute("SELECT DISTINCT product__sku FROM bronze.feefo_reviews__products").fetchall()
+    rating_rows = conn.execute("SELECT COUNT(*) FROM bronze.feefo_products_for_reviews").fetchone()
+    conn.close()
+
+    assert sorted(requested_skus) == sorted(sku for (sku,) in review_skus)
+    assert rating_rows is not None and rating_rows[0] == len(requested_skus)
+
+
+def _service_only_reviews(page: int) -> dict[str, Any]:
+    """Reviews response whose reviews have no products array."""
+    return {
+        "reviews": [{"url": f"https://feefo.com/review/{page}-1", "service": {"rating": {"rating": 5}}}],
+        "summary": {"meta": {"pages": 1, "page": page, "count": 1}},
+    }
+
+
+@pytest.mark.parametrize("mock_reviews_response", [_service_only_reviews])
+def test_two_phase_ratings_fetch_without_products_table(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that stream_ratings=False succeeds when no loaded review references a product.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker (serving service-only reviews)
+    """
+    run_dlt(
+        merchant_id="test-merchant",
+        mode="merge",
+        max_pages=1,
+        include_ratings=True,
+        stream_ratings=False,
+    )
+
+    assert len(mock_requests.reviews_calls) == 1
+    assert mock_requests.product_calls == []
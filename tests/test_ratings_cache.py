@@ -0,0 +1,87 @@
+"""Test the on-disk product ratings cache."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import orjson
+
+from pipeline.cache import RatingsCache
+from pipeline.extract import fetch_products_for_skus, run_dlt
+
+
+def test_cache_round_trip_is_keyed_by_period(tmp_path: Path) -> None:
+    """
+    Test that cached ratings are returned only for the same merchant, SKU and period.
+
+    Args:
+        tmp_path: pytest's built-in tmp_path fixture
+    """
+    products = [{"sku": "SKU-1", "rating": {"rating": 4.5}}]
+
+    with RatingsCache(str(tmp_path / "cache")) as cache:
+        cache.set("test-merchant", "SKU-1", 30, products)
+
+        assert cache.get("test-merchant", "SKU-1", 30) == products
+        assert cache.get("test-merchant", "SKU-1", None) is None
+        assert cache.get("other-merchant", "SKU-1", 30) is None
+
+
+def test_cache_entries_expire_after_ttl(tmp_path: Path) -> None:
+    """
+    Test that entries older than the TTL are treated as misses.
+
+    Args:
+        tmp_path: pytest's built-in tmp_path fixture
+    """
+    with RatingsCache(str(tmp_path / "cache"), ttl_seconds=60) as cache:
+        with patch("pipeline.cache.time.time", return_value=1_000.0):
+            cache.set("test-merchant", "SKU-1", None, [{"sku": "SKU-1"}])
+
+        with patch("pipeline.cache.time.time", return_value=1_030.0):
+            assert cache.get("test-merchant", "SKU-1", None) == [{"sku": "SKU-1"}]
+
+        with patch("pipeline.cache.time.time", return_value=1_061.0):
+            assert cache.get("test-merchant", "SKU-1", None) is None
+
+
+def test_cached_skus_skip_the_api(tmp_path: Path) -> None:
+    """
+    Test that only SKUs missing from the cache are requested from the API.
+
+    Args:
+        tmp_path: pytest's built-in tmp_path fixture
+    """
+    mock_product_response = {"products": [{"sku": "SKU-NEW", "rating": {"rating": 4.0}}]}
+
+    with RatingsCache(str(tmp_path / "cache")) as cache, patch("requests.Session.get") as mock_get:
+        cache.set("test-merchant", "SKU-CACHED", None, [{"sku": "SKU-CACHED", "rating": {"rating": 5.0}}])
+        mock_get.return_value.content = orjson.dumps(mock_product_response)
+        mock_get.return_value.raise_for_status = MagicMock()
+
+        result = list(fetch_products_for_skus("test-merchant", ["SKU-CACHED", "SKU-NEW"], cache=cache))
+
+        # Only the uncached SKU goes over the wire
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs["params"]["product_sku"] == "SKU-NEW"
+        assert sorted(product["sku"] for product in result) == ["SKU-CACHED", "SKU-NEW"]
+
+        # The fetched SKU is now cached too
+        assert cache.get("test-merchant", "SKU-NEW", None) == [p for p in result if p["sku"] == "SKU-NEW"]
+
+
+def test_second_run_serves_ratings_from_cache(mock_env: None, mock_requests: MagicMock) -> None:
+    """
+    Test that a repeat pipeline run makes no product ratings API calls.
+
+    Args:
+        mock_env: Environment setup fixture
+        mock_requests: Mocked requests call tracker
+    """
+    run_dlt(merchant_id="test-merchant", mode="merge", max_pages=1, include_ratings=True)
+    first_product_calls = len(mock_requests.product_calls)
+
+    run_dlt(merchant_id="test-merchant", mode="merge", max_pages=1, include_ratings=True)
+    second_product_calls = len(mock_requests.product_calls) - first_product_calls
+
+    assert first_product_calls > 0
+    assert second_product_calls == 0
@@ -1,10 +1,19 @@
 """Test transformation logic for SKU extraction and product enrichment."""
 
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
+from requests import HTTPError, Response
+from requests.adapters import HTTPAdapter
 
-from pipeline.extract import fetch_products_from_reviews
+from pipeline.extract import _get_session, categorise_review, fetch_products_for_skus, fetch_products_from_reviews
+from pipeline.settings import DEFAULT_BATCH_SIZE, HTTP_MAX_RETRIES, HTTP_POOL_MAXSIZE
+
+# Pre-encoded ratings body for tests that only inspect the outgoing requests
+PRODUCT_RESPONSE_BYTES = orjson.dumps({"products": [{"sku": "TEST-SKU", "rating": {"rating": 4.0}}]})
 
 
 def test_sku_extraction_from_nested_reviews() -> None:
@@ -23,8 +32,8 @@ def test_sku_extraction_from_nested_reviews() -> None:
 
     mock_product_response = {"products": [{"sku": "TEST-SKU-001", "rating": {"rating": 4.5, "count": 10}}]}
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = orjson.dumps(mock_product_response)
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform the reviews
@@ -65,10 +74,8 @@ def test_sku_deduplication() -> None:
         {"url": "https://feefo.com/review/3", "products": [{"product": {"sku": "UNIQUE-SKU", "title": "Product B"}}]},
     ]
 
-    mock_product_response = {"products": [{"sku": "TEST", "rating": {"rating": 4.5}}]}
-
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform the reviews
@@ -78,12 +85,12 @@ def test_sku_deduplication() -> None:
             )
         )
 
-        # Should only call API twice (once for DUPLICATE-SKU, once for UNIQUE-SKU)
-        assert mock_get.call_count == 2
+        # Should batch both unique SKUs into a single API call
+        assert mock_get.call_count == 1
 
-        # Verify the unique SKUs that were called
-        called_skus = [call.kwargs["params"]["product_sku"] for call in mock_get.call_args_list]
-        assert set(called_skus) == {"DUPLICATE-SKU", "UNIQUE-SKU"}
+        # Verify each unique SKU was requested exactly once
+        called_skus = mock_get.call_args.kwargs["params"]["product_sku"].split(",")
+        assert sorted(called_skus) == ["DUPLICATE-SKU", "UNIQUE-SKU"]
 
 
 def test_multiple_products_in_single_review() -> None:
@@ -102,10 +109,8 @@ def test_multiple_products_in_single_review() -> None:
         }
     ]
 
-    mock_product_response = {"products": [{"sku": "TEST", "rating": {"rating": 5.0}}]}
-
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform the reviews
@@ -115,11 +120,11 @@ def test_multiple_products_in_single_review() -> None:
             )
         )
 
-        # Should call API 3 times (once per unique SKU)
-        assert mock_get.call_count == 3
+        # Should batch all three SKUs into a single API call
+        assert mock_get.call_count == 1
 
         # Verify all SKUs were fetched
-        called_skus = [call.kwargs["params"]["product_sku"] for call in mock_get.call_args_list]
+        called_skus = mock_get.call_args.kwargs["params"]["product_sku"].split(",")
         assert set(called_skus) == {"SKU-A", "SKU-B", "SKU-C"}
 
 
@@ -129,10 +134,8 @@ def test_period_days_parameter_propagation() -> None:
     """
     mock_reviews = [{"url": "https://feefo.com/review/1", "products": [{"product": {"sku": "TEST-SKU"}}]}]
 
-    mock_product_response = {"products": [{"sku": "TEST-SKU", "rating": {"rating": 4.0}}]}
-
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform with period_days=30
@@ -154,10 +157,8 @@ def test_no_period_parameter_when_none() -> None:
     """
     mock_reviews = [{"url": "https://feefo.com/review/1", "products": [{"product": {"sku": "TEST-SKU"}}]}]
 
-    mock_product_response = {"products": [{"sku": "TEST-SKU", "rating": {"rating": 4.0}}]}
-
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform with period_days=None (default)
@@ -193,8 +194,8 @@ def test_missing_sku_is_skipped() -> None:
 
     mock_product_response = {"products": [{"sku": "VALID-SKU", "rating": {"rating": 5.0}}]}
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = orjson.dumps(mock_product_response)
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform the reviews
@@ -224,8 +225,8 @@ def test_empty_products_array_is_handled() -> None:
 
     mock_product_response = {"products": [{"sku": "VALID-SKU", "rating": {"rating": 4.5}}]}
 
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = orjson.dumps(mock_product_response)
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Should not raise an error
@@ -239,6 +240,100 @@ def test_empty_products_array_is_handled() -> None:
         assert mock_get.call_count == 1
 
 
+def test_skus_across_multiple_dispatch_batches() -> None:
+    """
+    Test that SKUs beyond one dispatch batch are all fetched exactly once.
+
+    Verifies full batches are dispatched while reading and the partial batch is flushed at the end.
+    """
+    skus = [f"SKU-{i:04d}" for i in range(DEFAULT_BATCH_SIZE * 2 + 5)]
+    mock_reviews = [{"url": f"https://feefo.com/review/{sku}", "products": [{"product": {"sku": sku}}]} for sku in skus]
+
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
+        mock_get.return_value.raise_for_status = MagicMock()
+
+        list(
+            fetch_products_from_reviews(
+                merchant_id="test-merchant", reviews_resource=iter(mock_reviews), period_days=None
+            )
+        )
+
+        # Every SKU requested exactly once, never more than DEFAULT_BATCH_SIZE per request
+        batches = [call.kwargs["params"]["product_sku"].split(",") for call in mock_get.call_args_list]
+        assert all(len(batch) <= DEFAULT_BATCH_SIZE for batch in batches)
+        assert sorted(sku for batch in batches for sku in batch) == skus
+
+
+def test_batch_rejected_falls_back_to_per_sku_requests() -> None:
+    """
+    Test that a 400 on a comma-separated SKU batch retries each SKU individually.
+    """
+    mock_reviews = [
+        {
+            "url": "https://feefo.com/review/1",
+            "products": [{"product": {"sku": "SKU-A"}}, {"product": {"sku": "SKU-B"}}],
+        }
+    ]
+
+    def fake_get(url: str, params: dict, **kwargs) -> MagicMock:
+        """Reject batched SKUs with a 400, answer single SKUs normally."""
+        response = MagicMock()
+        if "," in params["product_sku"]:
+            bad_response = Response()
+            bad_response.status_code = 400
+            response.raise_for_status.side_effect = HTTPError("400 Bad Request", response=bad_response)
+        else:
+            response.content = orjson.dumps({"products": [{"sku": params["product_sku"], "rating": {"rating": 4.0}}]})
+        return response
+
+    with patch("requests.Session.get", side_effect=fake_get) as mock_get:
+        result = list(
+            fetch_products_from_reviews(
+                merchant_id="test-merchant", reviews_resource=iter(mock_reviews), period_days=None
+            )
+        )
+
+        # One rejected batch call, then one call per SKU
+        called_skus = [call.kwargs["params"]["product_sku"] for call in mock_get.call_args_list]
+        assert called_skus == ["SKU-A,SKU-B", "SKU-A", "SKU-B"]
+        assert sorted(product["sku"] for product in result) == ["SKU-A", "SKU-B"]
+
+
+def test_in_flight_batches_are_bounded() -> None:
+    """
+    Test that no more than max_in_flight batches are requested at the same time.
+
+    Uses more workers than the in-flight limit so only the limit can cap concurrency.
+    """
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def slow_get(url: str, params: dict, **kwargs) -> MagicMock:
+        """Track how many requests overlap while simulating network latency."""
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        response = MagicMock()
+        response.content = orjson.dumps({"products": [{"sku": params["product_sku"]}]})
+        return response
+
+    skus = [f"SKU-{i}" for i in range(10)]
+
+    with patch("requests.Session.get", side_effect=slow_get):
+        result = list(
+            fetch_products_for_skus("test-merchant", iter(skus), max_workers=8, batch_size=1, max_in_flight=2)
+        )
+
+    assert sorted(product["sku"] for product in result) == skus
+    assert peak <= 2
+
+
 @pytest.mark.parametrize(
     "period_days,expected_param",
     [
@@ -258,10 +353,8 @@ def test_period_days_formatting(period_days: int, expected_param: str) -> None:
     """
     mock_reviews = [{"url": "https://feefo.com/review/1", "products": [{"product": {"sku": "TEST-SKU"}}]}]
 
-    mock_product_response = {"products": [{"sku": "TEST-SKU", "rating": {"rating": 4.0}}]}
-
-    with patch("requests.get") as mock_get:
-        mock_get.return_value.json.return_value = mock_product_response
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value.content = PRODUCT_RESPONSE_BYTES
         mock_get.return_value.raise_for_status = MagicMock()
 
         # Transform with specific period_days
@@ -274,3 +367,50 @@ def test_period_days_formatting(period_days: int, expected_param: str) -> None:
         # Verify correct formatting
         call_params = mock_get.call_args.kwargs["params"]
         assert call_params["since_period"] == expected_param
+
+
+def test_session_is_shared_and_pooled() -> None:
+    """
+    Test that product lookups share one keep-alive session with retries configured.
+    """
+    session = _get_session()
+
+    # Same session object is reused across calls
+    assert _get_session() is session
+
+    adapter = session.get_adapter("https://api.feefo.com")
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter.max_retries.total == HTTP_MAX_RETRIES
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == HTTP_POOL_MAXSIZE
+    assert session.headers["Connection"] == "keep-alive"
+
+
+@pytest.mark.parametrize(
+    "rating,review,expected",
+    [
+        (5, "terrible", "positive"),
+        (3, "love it", "neutral"),
+        (1, "great", "negative"),
+        (None, "Absolutely LOVE it, nothing bad to say", "positive"),
+        (None, "bad packaging but a great gift", "negative"),
+        (None, "lovely and badly wrapped", "neutral"),
+        (None, "Great! Arrived quickly.", "positive"),
+        (None, "worſt purchase", "neutral"),
+        (None, "dİsappointed", "neutral"),
+        (None, "amazıng", "neutral"),
+        (None, "fantastıc", "neutral"),
+        (None, "beautİful", "neutral"),
+        (None, "terrİble", "neutral"),
+        (None, "", "neutral"),
+    ],
+)
+def test_categorise_review(rating: float | None, review: str, expected: str) -> None:
+    """
+    Test that the rating takes priority and otherwise the first keyword in the review wins.
+
+    Args:
+        rating: Review rating
+        review: Review text
+        expected: Expected sentiment category
+    """
+    assert categorise_review(rating=rating, review=review) == expected